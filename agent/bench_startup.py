@@ -0,0 +1,222 @@
+"""
+Cold-start benchmark for the agent module.
+
+Each measurement runs in a fresh interpreter:
+- `-X importtime` breakdown of `import agent` (its direct imports by cumulative time)
+- time to load the graph from langgraph.json (as the agent server does) and to get
+  the first response from it, with and without AGENT_WARMUP
+
+The first response goes through the real get_model()/ChatOpenAI path against a
+local OpenAI-compatible stub server, so deferred imports and client construction
+are inside the timed region and no network or API key is needed.
+
+    python bench_startup.py [--top 20] [--max-load-ms N] [--max-first-response-ms N]
+                            [--lazy-module NAME ...]
+
+Exits non-zero when a budget is exceeded or a module that should load lazily is
+already imported once the graph is loaded. Budgets apply to the default run
+(AGENT_WARMUP unset).
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import List, Tuple
+
+AGENT_DIR = Path(__file__).resolve().parent
+
+# Runs in the child interpreter with argv = [graph id, module path, variable, *lazy modules].
+# The graph is loaded the way langgraph-api does it (spec_from_file_location plus
+# module.__dict__ lookup), so a graph the server can't resolve fails here too.
+# The last stdout line is the JSON result.
+FIRST_RESPONSE_SCRIPT = """
+import json, os, threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+USAGE = {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}
+
+class StubOpenAI(BaseHTTPRequestHandler):
+    # Answers any chat completion with "ok", streamed or not
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        base = {"id": "chatcmpl-bench", "created": 0, "model": body.get("model", "gpt-4o")}
+        if body.get("stream"):
+            chunks = [
+                {**base, "object": "chat.completion.chunk", "choices": [{"index": 0, "delta": {"role": "assistant", "content": "ok"}, "finish_reason": None}]},
+                {**base, "object": "chat.completion.chunk", "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]},
+                {**base, "object": "chat.completion.chunk", "choices": [], "usage": USAGE},
+            ]
+            payload = "".join(f"data: {json.dumps(c)}\\n\\n" for c in chunks) + "data: [DONE]\\n\\n"
+            content_type = "text/event-stream"
+        else:
+            payload = json.dumps({**base, "object": "chat.completion", "usage": USAGE, "choices": [
+                {"index": 0, "message": {"role": "assistant", "content": "ok"}, "finish_reason": "stop"},
+            ]})
+            content_type = "application/json"
+        data = payload.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+server = ThreadingHTTPServer(("127.0.0.1", 0), StubOpenAI)
+threading.Thread(target=server.serve_forever, daemon=True).start()
+base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+os.environ["OPENAI_API_BASE"] = base_url
+os.environ["OPENAI_BASE_URL"] = base_url
+
+import time
+started_at = time.perf_counter()
+import importlib.util, sys
+graph_id, path, variable, *lazy_modules = sys.argv[1:]
+spec = importlib.util.spec_from_file_location(graph_id, path)
+module = importlib.util.module_from_spec(spec)
+sys.modules[graph_id] = module
+spec.loader.exec_module(module)
+if variable not in module.__dict__:
+    raise SystemExit(f"Could not find graph {variable!r} in {path!r}")
+graph = module.__dict__[variable]
+loaded_at = time.perf_counter()
+eagerly_loaded = [m for m in lazy_modules if m in sys.modules]
+
+import asyncio
+from langchain_core.messages import HumanMessage
+
+asyncio.run(graph.ainvoke({"messages": [HumanMessage(content="hello")]}))
+responded_at = time.perf_counter()
+print(json.dumps({
+    "load_ms": (loaded_at - started_at) * 1000,
+    "first_request_ms": (responded_at - loaded_at) * 1000,
+    "first_response_ms": (responded_at - started_at) * 1000,
+    "eagerly_loaded": eagerly_loaded,
+}))
+"""
+
+
+def _graph_spec() -> Tuple[str, str, str]:
+    """Return (graph id, module path, variable) for the first graph in langgraph.json."""
+    config = json.loads((AGENT_DIR / "langgraph.json").read_text())
+    graph_id, target = next(iter(config["graphs"].items()))
+    path, variable = target.rsplit(":", 1)
+    return graph_id, str((AGENT_DIR / path).resolve()), variable
+
+
+def _child_env(warmup: bool = False) -> dict:
+    env = dict(os.environ)
+    env.pop("AGENT_WARMUP", None)
+    if warmup:
+        env["AGENT_WARMUP"] = "1"
+    # Requests only go to the local stub server
+    env["OPENAI_API_KEY"] = "sk-bench"
+    env["NO_PROXY"] = ",".join(filter(None, [env.get("NO_PROXY"), "127.0.0.1", "localhost"]))
+    for name in ("LANGSMITH_TRACING", "LANGCHAIN_TRACING_V2"):
+        env.pop(name, None)
+    return env
+
+
+def import_breakdown() -> Tuple[float, List[Tuple[str, float]]]:
+    """Return (total ms for `import agent`, [(module, cumulative ms)] for its direct imports)."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import agent"],
+        cwd=AGENT_DIR,
+        env=_child_env(),
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"`import agent` failed:\n{proc.stderr}")
+
+    total_ms = 0.0
+    direct: List[Tuple[str, float]] = []
+    pending: List[Tuple[str, float]] = []
+    for line in proc.stderr.splitlines():
+        # "import time: self [us] | cumulative | <2 spaces per nesting level>package"
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|", 2)
+        module = name.strip()
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        ms = int(cumulative) / 1000
+        # Children are reported before their parent, so collect depth-1 entries
+        # until the enclosing top-level import shows up
+        if depth == 1:
+            pending.append((module, ms))
+        elif depth == 0:
+            if module == "agent":
+                total_ms = ms
+                direct = pending
+            pending = []
+    direct.sort(key=lambda m: m[1], reverse=True)
+    return total_ms, direct
+
+
+def first_response(lazy_modules: List[str], warmup: bool = False) -> dict:
+    proc = subprocess.run(
+        [sys.executable, "-c", FIRST_RESPONSE_SCRIPT, *_graph_spec(), *lazy_modules],
+        cwd=AGENT_DIR,
+        env=_child_env(warmup),
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"first-response run failed:\n{proc.stderr}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=20, help="number of direct imports of the agent module to list")
+    parser.add_argument(
+        "--max-load-ms",
+        type=float,
+        default=None,
+        help="fail if loading the graph module the way the server does (wall clock) exceeds this",
+    )
+    parser.add_argument(
+        "--max-first-response-ms",
+        type=float,
+        default=None,
+        help="fail if load plus the first graph response (wall clock) exceeds this",
+    )
+    parser.add_argument(
+        "--lazy-module",
+        action="append",
+        default=[],
+        help="fail if this module is imported by loading the graph (repeatable)",
+    )
+    args = parser.parse_args()
+
+    total_ms, direct = import_breakdown()
+    print(f"-X importtime: import agent = {total_ms:.1f} ms")
+    print(f"{'cumulative ms':>14}  module")
+    for module, ms in direct[:args.top]:
+        print(f"{ms:>14.1f}  {module}")
+
+    timings = first_response(args.lazy_module)
+    warm = first_response([], warmup=True)
+    print()
+    print(f"{'':<16}{'load ms':>10}{'1st request ms':>16}{'1st response ms':>17}")
+    for label, t in (("default", timings), ("AGENT_WARMUP=1", warm)):
+        print(f"{label:<16}{t['load_ms']:>10.1f}{t['first_request_ms']:>16.1f}{t['first_response_ms']:>17.1f}")
+
+    failures = []
+    if args.max_load_ms is not None and timings["load_ms"] > args.max_load_ms:
+        failures.append(f"load took {timings['load_ms']:.1f} ms (budget {args.max_load_ms:.0f} ms)")
+    if args.max_first_response_ms is not None and timings["first_response_ms"] > args.max_first_response_ms:
+        failures.append(f"first response took {timings['first_response_ms']:.1f} ms (budget {args.max_first_response_ms:.0f} ms)")
+    for name in timings["eagerly_loaded"]:
+        failures.append(f"{name} is imported at load time but should be deferred")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,259 @@
+"""
+In-process usage accounting for the agent.
+
+Every `chat_node` model call is recorded here: token usage (prompt, completion
+and cached), model latency, graph step, tool calls by name and the size of the
+itemsState handed to the model. Totals are kept per deployment and per thread
+and rendered in the Prometheus text exposition format, so they can be scraped
+from the agent server (see webapp.py) or asserted on directly in-process.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Collection, Dict, List, Optional, Sequence, Tuple
+
+METRIC_PREFIX = "canvas_agent"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Deployment label attached to every series; set per environment (e.g. "staging")
+DEPLOYMENT = os.getenv("AGENT_DEPLOYMENT", "local")
+# Cap on per-thread series so long-running servers don't grow without bound
+MAX_TRACKED_THREADS = int(os.getenv("AGENT_METRICS_MAX_THREADS", "1000"))
+# Label for tool calls whose name isn't a known tool, so made-up names can't add series
+OTHER_TOOL = "other"
+
+LATENCY_BUCKETS: Tuple[float, ...] = (0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 64.0)
+PROMPT_TOKEN_BUCKETS: Tuple[float, ...] = (500, 1000, 2000, 4000, 8000, 16000, 32000, 64000, 128000)
+
+
+def extract_token_usage(response: Any) -> Tuple[int, int, int]:
+    """
+    Return (prompt, completion, cached) token counts from a chat model response.
+
+    Prefers LangChain's normalized `usage_metadata` and falls back to the raw
+    OpenAI `token_usage` block in `response_metadata`.
+    """
+    usage = getattr(response, "usage_metadata", None) or {}
+    if usage:
+        details = usage.get("input_token_details", {}) or {}
+        return (
+            int(usage.get("input_tokens", 0) or 0),
+            int(usage.get("output_tokens", 0) or 0),
+            int(details.get("cache_read", 0) or 0),
+        )
+    raw = (getattr(response, "response_metadata", None) or {}).get("token_usage", {}) or {}
+    details = raw.get("prompt_tokens_details", {}) or {}
+    return (
+        int(raw.get("prompt_tokens", 0) or 0),
+        int(raw.get("completion_tokens", 0) or 0),
+        int(details.get("cached_tokens", 0) or 0),
+    )
+
+
+class Histogram:
+    """Cumulative histogram with fixed upper bounds (the implicit +Inf bucket is last)."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+
+class UsageStats:
+    """Running totals for one aggregation key (a deployment or a single thread)."""
+
+    def __init__(self):
+        self.turns = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cached_tokens = 0
+        self.model_seconds = 0.0
+        self.tool_calls: Dict[str, int] = {}
+        # Latest observed values (gauges)
+        self.graph_step = 0
+        self.items = 0
+        self.items_state_chars = 0
+
+    def add(
+        self,
+        prompt_tokens: int,
+        completion_tokens: int,
+        cached_tokens: int,
+        latency_seconds: float,
+        graph_step: int,
+        tool_names: List[str],
+        items: int,
+        items_state_chars: int,
+    ) -> None:
+        self.turns += 1
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.cached_tokens += cached_tokens
+        self.model_seconds += latency_seconds
+        for name in tool_names:
+            self.tool_calls[name] = self.tool_calls.get(name, 0) + 1
+        self.graph_step = graph_step
+        self.items = items
+        self.items_state_chars = items_state_chars
+
+
+class UsageMetrics:
+    """Thread-safe registry of deployment and per-thread usage, rendered as Prometheus text."""
+
+    def __init__(self, deployment: str = DEPLOYMENT, max_threads: int = MAX_TRACKED_THREADS):
+        self.deployment = deployment
+        self.max_threads = max_threads
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.totals = UsageStats()
+            self.threads: "OrderedDict[str, UsageStats]" = OrderedDict()
+            self.turn_latency = Histogram(LATENCY_BUCKETS)
+            self.prompt_size = Histogram(PROMPT_TOKEN_BUCKETS)
+
+    def record_chat_turn(
+        self,
+        thread_id: Optional[str],
+        response: Any,
+        latency_seconds: float,
+        graph_step: Optional[int] = None,
+        items: int = 0,
+        items_state_chars: int = 0,
+        known_tools: Optional[Collection[str]] = None,
+    ) -> None:
+        """
+        Record a single `chat_node` model call.
+
+        When `known_tools` is given, tool calls for any other name are counted
+        under tool="other".
+        """
+        prompt_tokens, completion_tokens, cached_tokens = extract_token_usage(response)
+        tool_names: List[str] = []
+        for tc in getattr(response, "tool_calls", []) or []:
+            name = tc.get("name") if isinstance(tc, dict) else getattr(tc, "name", None)
+            if name:
+                name = str(name)
+                if known_tools is not None and name not in known_tools:
+                    name = OTHER_TOOL
+                tool_names.append(name)
+        values = (
+            prompt_tokens,
+            completion_tokens,
+            cached_tokens,
+            latency_seconds,
+            int(graph_step or 0),
+            tool_names,
+            items,
+            items_state_chars,
+        )
+        key = str(thread_id) if thread_id else "unknown"
+        with self._lock:
+            self.totals.add(*values)
+            stats = self.threads.pop(key, None) or UsageStats()
+            stats.add(*values)
+            # Most recently active threads sit at the end; evict from the front
+            self.threads[key] = stats
+            while len(self.threads) > self.max_threads:
+                self.threads.popitem(last=False)
+            self.turn_latency.observe(latency_seconds)
+            # No usage reported (e.g. streamed without usage); don't count it as a tiny prompt
+            if prompt_tokens:
+                self.prompt_size.observe(prompt_tokens)
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            lines: List[str] = []
+            deployment = {"deployment": self.deployment}
+            per_thread = [
+                ({"deployment": self.deployment, "thread_id": tid}, stats)
+                for tid, stats in self.threads.items()
+            ]
+
+            counters = [
+                ("turns_total", "chat_node model calls", lambda s: s.turns),
+                ("prompt_tokens_total", "Prompt tokens sent to the model", lambda s: s.prompt_tokens),
+                ("completion_tokens_total", "Completion tokens returned by the model", lambda s: s.completion_tokens),
+                ("cached_tokens_total", "Prompt tokens served from the provider cache", lambda s: s.cached_tokens),
+                ("model_latency_seconds_total", "Time spent waiting on the model", lambda s: s.model_seconds),
+            ]
+            for name, help_text, get in counters:
+                _header(lines, name, help_text, "counter")
+                _sample(lines, name, deployment, get(self.totals))
+                _header(lines, f"thread_{name}", f"{help_text}, per thread", "counter")
+                for labels, stats in per_thread:
+                    _sample(lines, f"thread_{name}", labels, get(stats))
+
+            _header(lines, "tool_calls_total", "Tool calls requested by the model, by tool name", "counter")
+            for tool_name, count in sorted(self.totals.tool_calls.items()):
+                _sample(lines, "tool_calls_total", {**deployment, "tool": tool_name}, count)
+            _header(lines, "thread_tool_calls_total", "Tool calls requested by the model, per thread and tool name", "counter")
+            for labels, stats in per_thread:
+                for tool_name, count in sorted(stats.tool_calls.items()):
+                    _sample(lines, "thread_tool_calls_total", {**labels, "tool": tool_name}, count)
+
+            gauges = [
+                ("thread_graph_step", "Latest LangGraph step observed in chat_node", lambda s: s.graph_step),
+                ("thread_items", "Canvas items in itemsState at the latest turn", lambda s: s.items),
+                ("thread_items_state_chars", "Characters of itemsState summary in the latest prompt", lambda s: s.items_state_chars),
+            ]
+            for name, help_text, get in gauges:
+                _header(lines, name, help_text, "gauge")
+                for labels, stats in per_thread:
+                    _sample(lines, name, labels, get(stats))
+
+            _histogram(lines, "turn_latency_seconds", "Model latency per chat_node turn", deployment, self.turn_latency)
+            _histogram(lines, "prompt_size_tokens", "Prompt size per chat_node turn, in tokens", deployment, self.prompt_size)
+            return "\n".join(lines) + "\n"
+
+
+def _escape_label_value(value: str) -> str:
+    # The text format only defines \\, \" and \n escapes; everything else stays raw UTF-8
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    return "{" + ",".join(f'{k}="{_escape_label_value(str(v))}"' for k, v in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, float) and value == float("inf"):
+        return "+Inf"
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _header(lines: List[str], name: str, help_text: str, kind: str) -> None:
+    lines.append(f"# HELP {METRIC_PREFIX}_{name} {help_text}")
+    lines.append(f"# TYPE {METRIC_PREFIX}_{name} {kind}")
+
+
+def _sample(lines: List[str], name: str, labels: Dict[str, str], value: float) -> None:
+    lines.append(f"{METRIC_PREFIX}_{name}{_format_labels(labels)} {_format_value(value)}")
+
+
+def _histogram(lines: List[str], name: str, help_text: str, labels: Dict[str, str], hist: Histogram) -> None:
+    _header(lines, name, help_text, "histogram")
+    cumulative = 0
+    for bound, count in zip((*hist.buckets, float("inf")), hist.counts):
+        cumulative += count
+        _sample(lines, f"{name}_bucket", {**labels, "le": _format_value(float(bound))}, cumulative)
+    _sample(lines, f"{name}_sum", labels, hist.sum)
+    _sample(lines, f"{name}_count", labels, hist.count)
+
+
+# Process-wide registry shared by the graph and the HTTP app
+usage_metrics = UsageMetrics()
@@ -0,0 +1,126 @@
+"""
+Tests for the in-process usage metrics (metrics.py) and the /usage/metrics route (webapp.py).
+
+Run from the agent directory: python -m pytest -q
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from metrics import CONTENT_TYPE, UsageMetrics
+
+
+def _response(usage_metadata=None, response_metadata=None, tool_calls=None):
+    """Stand-in for an AIMessage, exposing the attributes the registry reads."""
+    return SimpleNamespace(
+        usage_metadata=usage_metadata,
+        response_metadata=response_metadata or {},
+        tool_calls=tool_calls or [],
+    )
+
+
+def _samples(text):
+    """Map 'name{labels}' to its value for every sample line in Prometheus text."""
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            series, value = line.rsplit(" ", 1)
+            samples[series] = float(value)
+    return samples
+
+
+def test_records_usage_metadata():
+    m = UsageMetrics(deployment="test")
+    m.record_chat_turn(
+        "t1",
+        _response(
+            usage_metadata={"input_tokens": 1200, "output_tokens": 40, "input_token_details": {"cache_read": 1024}},
+            tool_calls=[{"name": "createItem"}, {"name": "inventedTool"}],
+        ),
+        latency_seconds=0.8,
+        graph_step=3,
+        items=2,
+        items_state_chars=150,
+        known_tools={"createItem"},
+    )
+    samples = _samples(m.render())
+    assert samples['canvas_agent_turns_total{deployment="test"}'] == 1
+    assert samples['canvas_agent_prompt_tokens_total{deployment="test"}'] == 1200
+    assert samples['canvas_agent_completion_tokens_total{deployment="test"}'] == 40
+    assert samples['canvas_agent_cached_tokens_total{deployment="test"}'] == 1024
+    assert samples['canvas_agent_thread_prompt_tokens_total{deployment="test",thread_id="t1"}'] == 1200
+    assert samples['canvas_agent_tool_calls_total{deployment="test",tool="createItem"}'] == 1
+    assert samples['canvas_agent_tool_calls_total{deployment="test",tool="other"}'] == 1
+    assert samples['canvas_agent_thread_graph_step{deployment="test",thread_id="t1"}'] == 3
+    assert samples['canvas_agent_thread_items{deployment="test",thread_id="t1"}'] == 2
+    assert samples['canvas_agent_thread_items_state_chars{deployment="test",thread_id="t1"}'] == 150
+
+
+def test_falls_back_to_response_metadata_token_usage():
+    m = UsageMetrics(deployment="test")
+    m.record_chat_turn(
+        "t1",
+        _response(response_metadata={"token_usage": {
+            "prompt_tokens": 900,
+            "completion_tokens": 12,
+            "prompt_tokens_details": {"cached_tokens": 512},
+        }}),
+        latency_seconds=0.5,
+    )
+    samples = _samples(m.render())
+    assert samples['canvas_agent_prompt_tokens_total{deployment="test"}'] == 900
+    assert samples['canvas_agent_completion_tokens_total{deployment="test"}'] == 12
+    assert samples['canvas_agent_cached_tokens_total{deployment="test"}'] == 512
+
+
+def test_evicts_least_recently_active_thread():
+    m = UsageMetrics(deployment="test", max_threads=2)
+    for thread_id in ("t1", "t2", "t1", "t3"):
+        m.record_chat_turn(thread_id, _response(), latency_seconds=0.1)
+    samples = _samples(m.render())
+    assert 'canvas_agent_thread_turns_total{deployment="test",thread_id="t2"}' not in samples
+    assert samples['canvas_agent_thread_turns_total{deployment="test",thread_id="t1"}'] == 2
+    assert samples['canvas_agent_thread_turns_total{deployment="test",thread_id="t3"}'] == 1
+    # Deployment totals keep evicted threads
+    assert samples['canvas_agent_turns_total{deployment="test"}'] == 4
+
+
+def test_histogram_buckets_and_inf():
+    m = UsageMetrics(deployment="test")
+    m.record_chat_turn("t1", _response(usage_metadata={"input_tokens": 1500}), latency_seconds=0.8)
+    m.record_chat_turn("t1", _response(usage_metadata={"input_tokens": 200000}), latency_seconds=100.0)
+    # No usage reported: counted for latency, not for prompt size
+    m.record_chat_turn("t1", _response(), latency_seconds=0.1)
+    samples = _samples(m.render())
+    latency = 'canvas_agent_turn_latency_seconds_bucket{deployment="test",le="%s"}'
+    assert samples[latency % "0.25"] == 1
+    assert samples[latency % "1.0"] == 2
+    assert samples[latency % "64.0"] == 2
+    assert samples[latency % "+Inf"] == 3
+    assert samples['canvas_agent_turn_latency_seconds_count{deployment="test"}'] == 3
+    assert samples['canvas_agent_turn_latency_seconds_sum{deployment="test"}'] == pytest.approx(100.9)
+    prompt = 'canvas_agent_prompt_size_tokens_bucket{deployment="test",le="%s"}'
+    assert samples[prompt % "500.0"] == 0
+    assert samples[prompt % "2000.0"] == 1
+    assert samples[prompt % "128000.0"] == 1
+    assert samples[prompt % "+Inf"] == 2
+    assert samples['canvas_agent_prompt_size_tokens_count{deployment="test"}'] == 2
+
+
+def test_label_values_are_escaped():
+    m = UsageMetrics(deployment='café "eu"\nwest\\1')
+    m.record_chat_turn("t1", _response(), latency_seconds=0.1)
+    assert 'canvas_agent_turns_total{deployment="café \\"eu\\"\\nwest\\\\1"} 1' in m.render().splitlines()
+
+
+def test_usage_metrics_endpoint():
+    pytest.importorskip("fastapi")
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+    from webapp import app
+
+    response = TestClient(app).get("/usage/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == CONTENT_TYPE
+    assert "# TYPE canvas_agent_turns_total counter" in response.text
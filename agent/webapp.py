@@ -0,0 +1,17 @@
+"""
+Custom HTTP routes mounted on the LangGraph agent server (see `http.app` in langgraph.json).
+"""
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+
+from metrics import CONTENT_TYPE, usage_metrics
+
+app = FastAPI()
+
+
+# Served under /usage so it doesn't shadow the server's built-in /metrics route
+@app.get("/usage/metrics")
+def usage_metrics_endpoint() -> PlainTextResponse:
+    """Per-deployment and per-thread usage in the Prometheus text format."""
+    return PlainTextResponse(usage_metrics.render(), media_type=CONTENT_TYPE)